@@ -1,179 +1,403 @@
 #!/usr/bin/env python3
 """
 TP357S Bluetooth Dashboard
-Polls sensors every 30 seconds and serves a web dashboard.
+Keeps sensors connected, checking the links every 30 seconds, and serves a web dashboard.
 """
 
 import asyncio
+import gzip
+import hashlib
 import struct
-from datetime import datetime
-import threading
+import time
+from array import array
 import logging
-from flask import Flask, render_template_string, jsonify
-from bleak import BleakClient
+import orjson
+from quart import Quart, Response, request
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from bleak import BleakClient, BleakScanner
+from bleak_retry_connector import establish_connection, get_device
 
 # --- Configuration ---
 POLLING_INTERVAL_SECONDS = 30
 CONNECTION_TIMEOUT = 15
+CONNECTION_ATTEMPTS = 3  # Retries with backoff inside each health check
+BLUETOOTH_ADAPTERS = 1  # Concurrent connection attempts the host can handle
+READING_QUEUE_SIZE = 64
+READING_BATCH_SECONDS = 1
 WEB_PORT = 5000
+GZIP_MIN_BYTES = 1024  # Smaller payloads are sent uncompressed
+STREAM_QUEUE_SIZE = 16
+STREAM_KEEPALIVE_SECONDS = 15
+HISTORY_SIZE = 1000  # Readings kept per sensor
+HISTORY_POINTS = 288  # Readings returned by /api/history
 SENSORS = {
     "Colonisation Bin": "E5:35:C4:81:8D:8C",
     "Fruiting Bucket": "C1:92:D2:5A:72:3E"
 }
 DATA_CHAR_UUID = "00010203-0405-0607-0809-0a0b0c0d2b10"
 
+# HTML id fragments for each sensor, e.g. "fruiting-bucket"
+SENSOR_SLUGS = {name: name.replace(' ', '-').lower() for name in SENSORS}
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # --- Data Storage ---
+# Timestamps are Unix epoch milliseconds, which JavaScript's Date takes as-is
+def now_ms():
+    return int(time.time() * 1000)
+
+class SensorHistory:
+    """Fixed-size ring buffer of readings kept as parallel typed arrays."""
+    
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self.timestamps = array('q', bytes(8 * size))    # Unix epoch milliseconds
+        self.temperatures = array('d', bytes(8 * size))  # Degrees C
+        self.humidity = array('B', bytes(size))          # Percent RH
+        self.labels = [''] * size                        # Chart labels, "HH:MM"
+        self.count = 0
+        self.head = 0
+    
+    def extend(self, timestamps, temperatures, humidity):
+        """Appends a batch of readings, oldest first, in bulk slice copies."""
+        n = min(len(timestamps), self.size)
+        if n == 0:
+            return
+        timestamps = timestamps[-n:]
+        self._write(self.timestamps, array('q', timestamps))
+        self._write(self.temperatures, array('d', temperatures[-n:]))
+        self._write(self.humidity, array('B', humidity[-n:]))
+        self._write(self.labels, [time.strftime('%H:%M', time.localtime(ts / 1000))
+                                  for ts in timestamps])
+        self.head = (self.head + n) % self.size
+        self.count = min(self.count + n, self.size)
+    
+    def _write(self, values, new):
+        """Copies `new` into `values` starting at head, wrapping at the end."""
+        first = min(len(new), self.size - self.head)
+        values[self.head:self.head + first] = new[:first]
+        values[:len(new) - first] = new[first:]
+    
+    def _ordered(self, values, count):
+        """Returns the newest `count` entries of `values`, oldest first."""
+        start = self.head - count
+        if start >= 0:
+            return values[start:self.head]
+        return values[start + self.size:] + values[:self.head]
+    
+    def recent(self, count):
+        """Returns (timestamps, labels, temperatures, humidity) for the newest readings."""
+        count = min(count, self.count)
+        return (self._ordered(self.timestamps, count),
+                self._ordered(self.labels, count),
+                self._ordered(self.temperatures, count),
+                self._ordered(self.humidity, count))
+    
+    def to_payload(self, count):
+        """Returns the newest readings in the /api/history response shape."""
+        timestamps, labels, temperatures, humidity = self.recent(count)
+        return {
+            'timestamps': timestamps.tolist(),
+            'labels': labels,
+            'temperatures': temperatures.tolist(),
+            'humidity': humidity.tolist()
+        }
+
 global_sensor_data = {}
 historical_data = {}
+clients = {}
+last_history_time = {}
+connect_slots = asyncio.Semaphore(BLUETOOTH_ADAPTERS)
+pending_readings = asyncio.Queue(maxsize=READING_QUEUE_SIZE)
+
+# Serialised API payloads, rebuilt only when the underlying data changes
+def with_etag(body):
+    """Returns (body, etag, gzipped body or None) for a response body."""
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    gzipped = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+    return body, etag, gzipped
+
+def encode_json(obj):
+    """Returns (body, etag, gzipped body or None) for a JSON payload."""
+    return with_etag(orjson.dumps(obj))
+
+EMPTY_HISTORY_JSON = encode_json({'timestamps': [], 'labels': [], 'temperatures': [], 'humidity': []})
+data_json_cache = encode_json(global_sensor_data)
+history_json_cache = {}
+
+# One message queue per connected /api/stream client
+stream_clients = set()
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {data}\n\n".encode('utf-8')
+
+def broadcast(event, data):
+    """Queues a server-sent event for every /api/stream client."""
+    message = sse_message(event, data)
+    for messages in stream_clients:
+        try:
+            messages.put_nowait(message)
+        except asyncio.QueueFull:
+            pass  # Client has stalled; it will catch up from the next update
+
+def set_sensor_data(name, data):
+    """Replaces a sensor's current reading and refreshes the /api/data payload."""
+    global data_json_cache
+    global_sensor_data[name] = {**data, 'mac': SENSORS[name], 'slug': SENSOR_SLUGS[name]}
+    data_json_cache = encode_json(global_sensor_data)
+    broadcast('data', data_json_cache[0].decode('utf-8'))
+
+def record_history(name, timestamps, temperatures, humidity):
+    """Appends readings to a sensor's history and refreshes its /api/history payload."""
+    if name not in historical_data:
+        historical_data[name] = SensorHistory()
+    history = historical_data[name]
+    history.extend(timestamps, temperatures, humidity)
+    
+    # Return last 24 hours of data (max 288 points at 5min intervals)
+    history_json_cache[name] = encode_json(history.to_payload(HISTORY_POINTS))
+    broadcast('history', name)
+
+# --- Web App ---
+# Quart keeps the Flask API but runs on the same event loop as the BLE tasks
+app = Quart(__name__)
 
-# --- Flask App ---
-app = Flask(__name__)
+@app.before_serving
+async def start_bluetooth():
+    app.bluetooth_task = asyncio.create_task(run_bluetooth())
+
+@app.after_serving
+async def stop_bluetooth():
+    app.bluetooth_task.cancel()
+    try:
+        await app.bluetooth_task
+    except asyncio.CancelledError:
+        pass
+    await disconnect_all()
 
 @app.route('/')
-def index():
-    return render_template_string(HTML_TEMPLATE)
+async def index():
+    response = cached_response(INDEX_HTML, mimetype='text/html')
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response
 
 @app.route('/api/data')
-def get_data():
-    return jsonify(global_sensor_data)
+async def get_data():
+    return cached_response(data_json_cache)
 
 @app.route('/api/history/<sensor_name>')
-def get_history(sensor_name):
+async def get_history(sensor_name):
     """Get historical data for a specific sensor."""
-    if sensor_name in historical_data:
-        # Return last 24 hours of data (max 288 points at 5min intervals)
-        recent_data = historical_data[sensor_name][-288:]
-        return jsonify({
-            'timestamps': [entry['timestamp'] for entry in recent_data],
-            'temperatures': [entry['temperature_c'] for entry in recent_data],
-            'humidity': [entry['humidity'] for entry in recent_data]
-        })
-    return jsonify({'timestamps': [], 'temperatures': [], 'humidity': []})
+    return cached_response(history_json_cache.get(sensor_name, EMPTY_HISTORY_JSON))
+
+@app.route('/api/stream')
+async def stream():
+    """Pushes sensor updates to the browser as server-sent events."""
+    async def events():
+        messages = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stream_clients.add(messages)
+        try:
+            yield sse_message('data', data_json_cache[0].decode('utf-8'))
+            while True:
+                try:
+                    yield await asyncio.wait_for(messages.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+        finally:
+            stream_clients.discard(messages)
+    
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    response.timeout = None  # Streams stay open indefinitely
+    return response
+
+def cached_response(cached, mimetype='application/json'):
+    """Serves a pre-serialised payload, or 304 if the client already has it."""
+    body, etag, gzipped = cached
+    use_gzip = gzipped is not None and request.accept_encodings['gzip'] > 0
+    if use_gzip:
+        body, etag = gzipped, f"{etag}-gz"
+    
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+        if use_gzip:
+            response.content_encoding = 'gzip'
+    response.set_etag(etag)
+    if gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    return response
 
 # --- Bluetooth Logic ---
+# Byte 3 is temperature in tenths of a degree C, byte 5 is humidity in %
+unpack_tp357s = struct.Struct('<xxxBxB').unpack_from
+
 def parse_tp357s_data(data):
     """Parses the 7-byte data from a TP357S sensor."""
     if not data or len(data) != 7:
         logger.warning(f"Invalid data received: {data.hex() if data else 'None'}")
         return None
     
-    try:
-        temp_c = data[3] / 10.0
-        humidity = data[5]
-        
-        if -40 <= temp_c <= 85 and 0 <= humidity <= 100:
-            return {
-                'temperature_c': round(temp_c, 1),
-                'temperature_f': round((temp_c * 9/5) + 32, 1),
-                'humidity': round(humidity),
-            }
-        else:
-            logger.warning(f"Parsed values out of range: temp={temp_c}, humidity={humidity}")
-    except Exception as e:
-        logger.error(f"Parse error: {e}")
+    temp_raw, humidity = unpack_tp357s(data)
+    if -400 <= temp_raw <= 850 and 0 <= humidity <= 100:
+        return {
+            'temperature_c': temp_raw / 10,
+            # Integer maths for (C * 9/5) + 32, rounded to 0.1
+            'temperature_f': (temp_raw * 18 + 3205) // 10 / 10,
+            'humidity': humidity,
+        }
+    logger.warning(f"Parsed values out of range: temp={temp_raw / 10}, humidity={humidity}")
     return None
 
-async def read_sensor_once(name, address):
-    """Connects to a sensor, gets one reading, and disconnects."""
-    logger.info(f"Attempting to read from {name}...")
-    client = None
-    notification_started = False
+def make_handler(name):
+    """Builds the notification handler that records readings for one sensor."""
+    def notification_handler(sender, data):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw data from %s: %s (length: %d)", name, data.hex(), len(data))
+        parsed_data = parse_tp357s_data(data)
+        if parsed_data:
+            # Hand off to reading_consumer so the callback returns immediately
+            try:
+                pending_readings.put_nowait((name, parsed_data, now_ms()))
+            except asyncio.QueueFull:
+                logger.warning(f"Reading queue full, dropping reading from {name}")
+    return notification_handler
+
+def store_readings(batch):
+    """Applies a batch of (name, parsed_data, received_ms) readings."""
+    latest = {}
+    samples = {}
+    for name, parsed_data, received_ms in batch:
+        latest[name] = (parsed_data, received_ms)
+        
+        # Sensors push far more often than we chart, so sample history
+        # at the polling interval
+        if received_ms - last_history_time.get(name, float('-inf')) < POLLING_INTERVAL_SECONDS * 1000:
+            continue
+        last_history_time[name] = received_ms
+        
+        timestamps, temperatures, humidity = samples.setdefault(name, ([], [], []))
+        timestamps.append(received_ms)
+        temperatures.append(parsed_data['temperature_c'])
+        humidity.append(parsed_data['humidity'])
+        
+        logger.info(f"SUCCESS: {name} - {parsed_data['temperature_c']}°C, {parsed_data['humidity']}% ")
     
-    try:
-        data_received = asyncio.Event()
-        
-        def notification_handler(sender, data):
-            logger.info(f"Raw data from {name}: {data.hex()} (length: {len(data)})")
-            parsed_data = parse_tp357s_data(data)
-            if parsed_data:
-                timestamp = datetime.now().isoformat()
-                global_sensor_data[name] = {
-                    **parsed_data,
-                    'last_updated': timestamp,
-                    'status': 'online'
-                }
-                
-                # Store historical data
-                if name not in historical_data:
-                    historical_data[name] = []
-                
-                historical_data[name].append({
-                    'timestamp': timestamp,
-                    'temperature_c': parsed_data['temperature_c'],
-                    'humidity': parsed_data['humidity']
-                })
-                
-                # Keep only last 1000 readings (~8 hours at 30s intervals)
-                if len(historical_data[name]) > 1000:
-                    historical_data[name] = historical_data[name][-1000:]
-                
-                logger.info(f"SUCCESS: {name} - {parsed_data['temperature_c']}°C, {parsed_data['humidity']}% ")
-                data_received.set()
+    # Store historical data, keeping only the last 1000 readings
+    # (~8 hours at 30s intervals)
+    for name, (timestamps, temperatures, humidity) in samples.items():
+        record_history(name, timestamps, temperatures, humidity)
+    
+    # Only the newest reading per sensor is worth publishing
+    for name, (parsed_data, received_ms) in latest.items():
+        set_sensor_data(name, {
+            **parsed_data,
+            'last_updated': received_ms,
+            'status': 'online'
+        })
 
-        # Explicit connection management
-        client = BleakClient(address, timeout=CONNECTION_TIMEOUT)
-        logger.info(f"Connecting to {name}...")
-        await client.connect()
-        
-        if not client.is_connected:
-            logger.warning(f"Could not connect to {name}.")
-            global_sensor_data[name] = {'status': 'offline', 'last_updated': datetime.now().isoformat()}
-            return
+async def reading_consumer():
+    """Drains queued notifications in batches, at most every READING_BATCH_SECONDS."""
+    while True:
+        batch = [await pending_readings.get()]
+        while not pending_readings.empty():
+            batch.append(pending_readings.get_nowait())
+        store_readings(batch)
+        await asyncio.sleep(READING_BATCH_SECONDS)
 
-        logger.info(f"Connected to {name}, starting notifications...")
-        await client.start_notify(DATA_CHAR_UUID, notification_handler)
-        notification_started = True
-        
-        try:
-            await asyncio.wait_for(data_received.wait(), timeout=10)
-            logger.info(f"Data received from {name}, disconnecting...")
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for notification from {name}.")
-            global_sensor_data[name] = {'status': 'timeout', 'last_updated': datetime.now().isoformat()}
-
-    except Exception as e:
-        logger.error(f"Error reading {name}: {e}")
-        global_sensor_data[name] = {'status': 'error', 'last_updated': datetime.now().isoformat()}
+def make_disconnected_callback(name):
+    """Builds the callback that flags a sensor as offline when its link drops."""
+    def on_disconnect(client):
+        logger.warning(f"{name} disconnected, will reconnect on next health check.")
+        set_sensor_data(name, {
+            **global_sensor_data.get(name, {}),
+            'status': 'offline',
+            'last_updated': now_ms()
+        })
+    return on_disconnect
+
+# Built once so reconnects reuse the same callbacks
+notification_handlers = {name: make_handler(name) for name in SENSORS}
+disconnected_callbacks = {name: make_disconnected_callback(name) for name in SENSORS}
+
+async def ensure_connected(name):
+    """Connects and subscribes to a sensor unless it is already connected."""
+    client = clients.get(name)
+    if client is not None and client.is_connected:
+        return
     
-    finally:
-        # Ensure proper cleanup
-        if client and client.is_connected:
-            try:
-                if notification_started:
-                    logger.info(f"Stopping notifications for {name}...")
-                    await client.stop_notify(DATA_CHAR_UUID)
-                    await asyncio.sleep(0.5)  # Give time for cleanup
-                
-                logger.info(f"Disconnecting from {name}...")
-                await client.disconnect()
-                await asyncio.sleep(1)  # Force disconnect delay
-                logger.info(f"Disconnected from {name}")
-                
-            except Exception as cleanup_error:
-                logger.error(f"Error during cleanup for {name}: {cleanup_error}")
-        
-        # Additional cleanup - try to clear any lingering connections
+    address = SENSORS[name]
+    client = None
+    
+    # Only as many connection attempts in flight as there are adapters
+    async with connect_slots:
         try:
-            if client:
-                del client
-        except:
-            pass
+            # BlueZ may already know the device (or even hold a connection to
+            # it), in which case no scan is needed
+            device = await get_device(address) or await BleakScanner.find_device_by_address(
+                address, timeout=CONNECTION_TIMEOUT)
+            if device is None:
+                logger.warning(f"Could not find {name}.")
+                set_sensor_data(name, {'status': 'offline', 'last_updated': now_ms()})
+                return
+            
+            logger.info(f"Connecting to {name}...")
+            client = await establish_connection(
+                BleakClient, device, name,
+                disconnected_callback=disconnected_callbacks[name],
+                max_attempts=CONNECTION_ATTEMPTS)
+            clients[name] = client
+            
+            logger.info(f"Connected to {name}, starting notifications...")
+            await client.start_notify(DATA_CHAR_UUID, notification_handlers[name])
+        
+        except Exception as e:
+            logger.error(f"Error connecting to {name}: {e}")
+            set_sensor_data(name, {'status': 'error', 'last_updated': now_ms()})
+            if client is not None and client.is_connected:
+                try:
+                    await client.disconnect()
+                except Exception as cleanup_error:
+                    logger.error(f"Error during cleanup for {name}: {cleanup_error}")
 
 async def polling_loop():
-    """The main sensor polling loop."""
+    """Keeps every sensor connected; readings arrive through notifications."""
     while True:
-        logger.info("--- Starting new polling cycle ---")
-        for name, address in SENSORS.items():
-            await read_sensor_once(name, address)
-            await asyncio.sleep(2) # Stagger connections
+        results = await asyncio.gather(*(ensure_connected(name) for name in SENSORS),
+                                       return_exceptions=True)
+        for name, result in zip(SENSORS, results):
+            if isinstance(result, Exception):
+                logger.error(f"Health check failed for {name}: {result}")
         
-        logger.info(f"--- Cycle complete, waiting {POLLING_INTERVAL_SECONDS} seconds ---")
         await asyncio.sleep(POLLING_INTERVAL_SECONDS)
 
+async def disconnect_all():
+    """Releases every sensor so BlueZ doesn't hold the links after exit."""
+    for name, client in list(clients.items()):
+        if not client.is_connected:
+            continue
+        try:
+            logger.info(f"Stopping notifications for {name}...")
+            await client.stop_notify(DATA_CHAR_UUID)
+        except Exception as cleanup_error:
+            logger.error(f"Error stopping notifications for {name}: {cleanup_error}")
+        try:
+            logger.info(f"Disconnecting from {name}...")
+            await client.disconnect()
+            logger.info(f"Disconnected from {name}")
+        except Exception as cleanup_error:
+            logger.error(f"Error during cleanup for {name}: {cleanup_error}")
+    clients.clear()
+
+async def run_bluetooth():
+    """Runs the connection health checks alongside the reading consumer."""
+    await asyncio.gather(polling_loop(), reading_consumer())
+
 # --- HTML Template ---
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -498,137 +722,138 @@ HTML_TEMPLATE = """
     </main>
 
     <script>
-        let sensorAddresses = {};
+        const STATUS_DISPLAY = {
+            online:  { text: 'Online',  className: 'online',  color: 'var(--accent-green)' },
+            error:   { text: 'Error',   className: 'error',   color: 'var(--accent-red)' },
+            timeout: { text: 'Timeout', className: 'error',   color: 'var(--accent-red)' },
+            offline: { text: 'Offline', className: 'offline', color: 'var(--text-muted)' }
+        };
+        
+        // Sensor DOM nodes and Chart.js instances, built once and updated in place
+        const SENSOR_GROUPS = {};
+        const CHARTS = {};
+        
+        // ETags of the history each sensor's charts currently show
+        const HISTORY_ETAGS = {};
+        
+        function createSensorGroup(name, sensor) {
+            const sensorGroup = document.createElement('div');
+            sensorGroup.className = 'sensor-group';
+            sensorGroup.innerHTML = `
+                <div class="sensor-group-header">
+                    <h2 class="sensor-group-title">${name}</h2>
+                    <div class="device-info-compact">
+                        <div class="device-info-item">
+                            <span class="device-mac">${sensor.mac || 'Unknown'}</span>
+                        </div>
+                        <div class="device-info-item">
+                            <div class="device-status">
+                                <div class="device-status-dot" data-field="status-dot"></div>
+                                <span data-field="status-text"></span>
+                            </div>
+                        </div>
+                        <div class="device-info-item">
+                            <span data-field="last-updated"></span>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="current-readings">
+                    <div class="current-card">
+                        <div class="current-label">LIVE TEMPERATURE</div>
+                        <div class="current-value" data-field="temperature"></div>
+                        <div class="current-sublabel">Real-time reading</div>
+                    </div>
+                    <div class="current-card">
+                        <div class="current-label">LIVE HUMIDITY</div>
+                        <div class="current-value" data-field="humidity"></div>
+                        <div class="current-sublabel">Real-time reading</div>
+                    </div>
+                </div>
+                
+                <div class="section-divider"></div>
+                
+                <div class="card">
+                    <div class="card-header">
+                        <div class="card-title">Temperature History</div>
+                    </div>
+                    <div class="chart-container">
+                        <canvas id="temp-chart-${sensor.slug}"></canvas>
+                    </div>
+                </div>
+                
+                <div class="card">
+                    <div class="card-header">
+                        <div class="card-title">Humidity History</div>
+                    </div>
+                    <div class="chart-container">
+                        <canvas id="humidity-chart-${sensor.slug}"></canvas>
+                    </div>
+                </div>
+            `;
+            
+            document.getElementById('sensor-container').appendChild(sensorGroup);
+            
+            const field = (key) => sensorGroup.querySelector(`[data-field="${key}"]`);
+            return {
+                statusDot: field('status-dot'),
+                statusText: field('status-text'),
+                lastUpdated: field('last-updated'),
+                temperature: field('temperature'),
+                humidity: field('humidity'),
+                tempChart: document.getElementById(`temp-chart-${sensor.slug}`),
+                humidityChart: document.getElementById(`humidity-chart-${sensor.slug}`)
+            };
+        }
         
-        async function updateDashboard() {
+        function updateDashboard(data) {
             try {
-                const response = await fetch('/api/data');
-                const data = await response.json();
-                const container = document.getElementById('sensor-container');
                 const headerStatus = document.getElementById('header-status');
                 
-                container.innerHTML = '';
-                
                 const sensorCount = Object.keys(data).length;
                 const onlineCount = Object.values(data).filter(s => s.status === 'online').length;
                 headerStatus.textContent = `Connected • ${sensorCount} Sensors • ${onlineCount} Online`;
                 
                 for (const [name, sensor] of Object.entries(data)) {
-                    const sensorGroup = document.createElement('div');
-                    sensorGroup.className = 'sensor-group';
+                    if (!SENSOR_GROUPS[name]) {
+                        SENSOR_GROUPS[name] = createSensorGroup(name, sensor);
+                        updateCharts(name);
+                    }
+                    const group = SENSOR_GROUPS[name];
                     
                     let temp_c = (sensor.temperature_c !== null && sensor.temperature_c !== undefined) ? sensor.temperature_c.toFixed(1) : '--';
                     let humidity = (sensor.humidity !== null && sensor.humidity !== undefined) ? sensor.humidity.toFixed(0) : '--';
                     let last_updated = sensor.last_updated ? new Date(sensor.last_updated).toLocaleTimeString() : 'Never';
                     
-                    let statusText = 'Offline';
-                    let statusClass = 'offline';
-                    if (sensor.status === 'online') {
-                        statusText = 'Online';
-                        statusClass = 'online';
-                    } else if (sensor.status === 'error') {
-                        statusText = 'Error';
-                        statusClass = 'error';
-                    } else if (sensor.status === 'timeout') {
-                        statusText = 'Timeout';
-                        statusClass = 'error';
-                    }
-                    
-                    // Get MAC address from SENSORS config
-                    let macAddress = 'Unknown';
-                    if (name === 'Colonisation Bin') macAddress = 'E5:35:C4:81:8D:8C';
-                    if (name === 'Fruiting Bucket') macAddress = 'C1:92:D2:5A:72:3E';
+                    const status = STATUS_DISPLAY[sensor.status] || STATUS_DISPLAY.offline;
                     
-                    sensorGroup.innerHTML = `
-                        <div class="sensor-group-header">
-                            <h2 class="sensor-group-title">${name}</h2>
-                            <div class="device-info-compact">
-                                <div class="device-info-item">
-                                    <span class="device-mac">${macAddress}</span>
-                                </div>
-                                <div class="device-info-item">
-                                    <div class="device-status">
-                                        <div class="device-status-dot ${statusClass}"></div>
-                                        <span style="color: var(--accent-${statusClass === 'online' ? 'green' : statusClass === 'error' ? 'red' : 'text-muted'});">${statusText}</span>
-                                    </div>
-                                </div>
-                                <div class="device-info-item">
-                                    <span>Updated ${last_updated}</span>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="current-readings">
-                            <div class="current-card">
-                                <div class="current-label">LIVE TEMPERATURE</div>
-                                <div class="current-value">${temp_c}°C</div>
-                                <div class="current-sublabel">Real-time reading</div>
-                            </div>
-                            <div class="current-card">
-                                <div class="current-label">LIVE HUMIDITY</div>
-                                <div class="current-value">${humidity}%</div>
-                                <div class="current-sublabel">Real-time reading</div>
-                            </div>
-                        </div>
-                        
-                        <div class="section-divider"></div>
-                        
-                        <div class="card">
-                            <div class="card-header">
-                                <div class="card-title">Temperature History</div>
-                            </div>
-                            <div class="chart-container">
-                                <canvas id="temp-chart-${name.replace(' ', '-').toLowerCase()}"></canvas>
-                            </div>
-                        </div>
-                        
-                        <div class="card">
-                            <div class="card-header">
-                                <div class="card-title">Humidity History</div>
-                            </div>
-                            <div class="chart-container">
-                                <canvas id="humidity-chart-${name.replace(' ', '-').toLowerCase()}"></canvas>
-                            </div>
-                        </div>
-                    `;
-                    
-                    container.appendChild(sensorGroup);
-                    
-                    // Create charts for this sensor
-                    setTimeout(() => {
-                        createCharts(name);
-                    }, 100);
+                    group.statusDot.className = `device-status-dot ${status.className}`;
+                    group.statusText.textContent = status.text;
+                    group.statusText.style.color = status.color;
+                    group.lastUpdated.textContent = `Updated ${last_updated}`;
+                    group.temperature.textContent = `${temp_c}°C`;
+                    group.humidity.textContent = `${humidity}%`;
                 }
             } catch (error) {
-                console.error("Failed to fetch sensor data:", error);
-                document.getElementById('header-status').textContent = 'Connection Error';
+                console.error("Failed to render sensor data:", error);
             }
         }
         
-        async function createCharts(sensorName) {
-            try {
-                const response = await fetch(`/api/history/${encodeURIComponent(sensorName)}`);
-                const historyData = await response.json();
-                
-                if (!historyData.timestamps || historyData.timestamps.length === 0) {
-                    return; // No historical data yet
-                }
-                
-                const chartId = sensorName.replace(' ', '-').toLowerCase();
-                const tempCtx = document.getElementById(`temp-chart-${chartId}`);
-                const humidCtx = document.getElementById(`humidity-chart-${chartId}`);
-                
-                if (!tempCtx || !humidCtx) return;
-                
-                const labels = historyData.timestamps.map(ts => {
-                    const date = new Date(ts);
-                    return date.toLocaleTimeString('en-US', { 
-                        hour: '2-digit', 
-                        minute: '2-digit' 
-                    });
-                });
-                
-                const chartOptions = {
+        function createChart(ctx, labels, data, borderColor, backgroundColor) {
+            return new Chart(ctx, {
+                type: 'line',
+                data: {
+                    labels: labels,
+                    datasets: [{
+                        data: data,
+                        borderColor: borderColor,
+                        backgroundColor: backgroundColor,
+                        borderWidth: 2,
+                        fill: true,
+                        tension: 0.4
+                    }]
+                },
+                options: {
                     responsive: true,
                     maintainAspectRatio: false,
                     plugins: {
@@ -657,68 +882,87 @@ HTML_TEMPLATE = """
                     elements: {
                         point: { radius: 0, hoverRadius: 4 }
                     }
-                };
-                
-                // Temperature Chart
-                new Chart(tempCtx, {
-                    type: 'line',
-                    data: {
-                        labels: labels,
-                        datasets: [{
-                            data: historyData.temperatures,
-                            borderColor: '#2196f3',
-                            backgroundColor: 'rgba(33, 150, 243, 0.1)',
-                            borderWidth: 2,
-                            fill: true,
-                            tension: 0.4
-                        }]
-                    },
-                    options: chartOptions
+                }
+            });
+        }
+        
+        function setChartData(chart, labels, data) {
+            chart.data.labels = labels;
+            chart.data.datasets[0].data = data;
+            chart.update('none');
+        }
+        
+        async function updateCharts(sensorName) {
+            try {
+                // no-store so a 304 reaches us instead of being replayed from cache
+                const etag = HISTORY_ETAGS[sensorName];
+                const response = await fetch(`/api/history/${encodeURIComponent(sensorName)}`, {
+                    cache: 'no-store',
+                    headers: etag ? { 'If-None-Match': etag } : {}
                 });
+                if (response.status === 304) {
+                    return; // Charts already show this data
+                }
+                const historyData = await response.json();
                 
-                // Humidity Chart  
-                new Chart(humidCtx, {
-                    type: 'line',
-                    data: {
-                        labels: labels,
-                        datasets: [{
-                            data: historyData.humidity,
-                            borderColor: '#00acc1',
-                            backgroundColor: 'rgba(0, 172, 193, 0.1)', 
-                            borderWidth: 2,
-                            fill: true,
-                            tension: 0.4
-                        }]
-                    },
-                    options: chartOptions
-                });
+                if (!historyData.timestamps || historyData.timestamps.length === 0) {
+                    return; // No historical data yet
+                }
+                
+                const labels = historyData.labels;
+                
+                const charts = CHARTS[sensorName];
+                if (charts) {
+                    setChartData(charts.temp, labels, historyData.temperatures);
+                    setChartData(charts.humidity, labels, historyData.humidity);
+                    HISTORY_ETAGS[sensorName] = response.headers.get('ETag');
+                    return;
+                }
+                
+                const group = SENSOR_GROUPS[sensorName];
+                if (!group) return;
+                const tempCtx = group.tempChart;
+                const humidCtx = group.humidityChart;
+                
+                CHARTS[sensorName] = {
+                    temp: createChart(tempCtx, labels, historyData.temperatures,
+                                      '#2196f3', 'rgba(33, 150, 243, 0.1)'),
+                    humidity: createChart(humidCtx, labels, historyData.humidity,
+                                          '#00acc1', 'rgba(0, 172, 193, 0.1)')
+                };
+                HISTORY_ETAGS[sensorName] = response.headers.get('ETag');
                 
             } catch (error) {
-                console.error(`Failed to create charts for ${sensorName}:`, error);
+                console.error(`Failed to update charts for ${sensorName}:`, error);
             }
         }
 
-        setInterval(updateDashboard, 5000);
-        updateDashboard();
+        const events = new EventSource('/api/stream');
+        events.addEventListener('data', (event) => updateDashboard(JSON.parse(event.data)));
+        events.addEventListener('history', (event) => updateCharts(event.data));
+        events.onopen = () => {
+            // Catch up on history missed while disconnected
+            Object.keys(SENSOR_GROUPS).forEach(updateCharts);
+        };
+        events.onerror = () => {
+            // EventSource reconnects on its own
+            document.getElementById('header-status').textContent = 'Connection Error';
+        };
     </script>
 </body>
 </html>
 """
 
-# --- Main Execution ---
-def run_async_loop():
-    """Runs the asyncio event loop in a separate thread."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(polling_loop())
+# The page has no template variables, so it is encoded once at startup
+INDEX_HTML = with_etag(HTML_TEMPLATE.encode('utf-8'))
 
+# --- Main Execution ---
 if __name__ == "__main__":
     logger.info("Starting ThermoPro Dashboard...")
     
-    # Start the Bluetooth polling in a background thread
-    polling_thread = threading.Thread(target=run_async_loop, daemon=True)
-    polling_thread.start()
-    
-    # Start the Flask web server
+    # Bluetooth polling starts with the server (see start_bluetooth), on one
+    # event loop; equivalent to `hypercorn dashboard:app --bind 0.0.0.0:5000`
+    config = Config()
+    config.bind = [f"0.0.0.0:{WEB_PORT}"]
     logger.info(f"Dashboard available at http://localhost:{WEB_PORT}")
-    app.run(host='0.0.0.0', port=WEB_PORT, debug=False)
+    asyncio.run(serve(app, config))
@@ -5,19 +5,75 @@ Always-on web dashboard for your TP357S sensors
 Temperature = Byte 3 / 10, Humidity = Byte 5
 """
 
-from flask import Flask, render_template_string, jsonify
+from quart import Quart, Response, request
 import asyncio
-import threading
+import gzip
+import hashlib
+import logging
+import struct
 import time
-from datetime import datetime
+from collections import deque
+import orjson
 from bleak import BleakClient
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
 
-app = Flask(__name__)
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-# Global data store
-sensor_data = {}
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+app = Quart(__name__)
+
+# Log every reading
+DEBUG = False
+
+log = logging.getLogger(__name__)
+
+# Byte 3 -> temperature lookups, so parsing does no float maths per packet
+_TEMP_C = [b / 10.0 for b in range(256)]
+_TEMP_F = [c * 9/5 + 32 for c in _TEMP_C]
+_VALID_T = [-40 <= c <= 85 for c in _TEMP_C]
+
+# Display strings, formatted once here rather than per viewer in the page
+_TEMP_C_STR = [f"{c:.1f}" for c in _TEMP_C]
+_TEMP_F_STR = [f"{f:.1f}" for f in _TEMP_F]
+_HUM_STR = [str(h) for h in range(256)]
+
+# Byte 3 (temperature*10) and byte 5 (humidity%) in one call
+_UNPACK = struct.Struct('<xxxBxB').unpack_from
+
+# How often notification-side readings are published to HTTP readers
+PUBLISH_INTERVAL = 0.5
+
+# Comment line sent to idle /api/stream clients so proxies keep them open
+STREAM_KEEPALIVE = 15
+
+# Readings kept per sensor for trends (10 minutes at one per second)
+HISTORY_SIZE = 600
+
+# Global data store: notification handlers update the dashboard's per-sensor
+# buffers in place, and the publisher swaps copies into _sensor_snapshot,
+# which is all readers see
+_sensor_snapshot = {}
 connection_status = {}
 
+# Bumped whenever a reading or connection status changes; the publisher
+# records the version it published, which doubles as the /api/sensors ETag
+_data_version = 0
+_published_version = 0
+
+# Versions restart at 0 with the process, so ETags carry a per-process prefix
+_BOOT_ID = format(time.time_ns(), 'x')
+
+# Set (and replaced) by the publisher each time it publishes a new version
+_published = asyncio.Event()
+
 class TP357SDashboard:
     def __init__(self):
         self.sensors = {
@@ -28,62 +84,103 @@ class TP357SDashboard:
         # The characteristic that sends real-time data
         self.DATA_CHAR_UUID = "00010203-0405-0607-0809-0a0b0c0d2b10"
         self.running = False
+        self._stop_event = asyncio.Event()
+        
+        # Latest reading per sensor, updated in place; ts_ms 0 means none yet
+        self._buf = {name: {'temperature_c': 0.0, 'temperature_f': 0.0, 'humidity': 0,
+                            't_c_str': '', 't_f_str': '', 'h_str': '', 'ts_ms': 0}
+                     for name in self.sensors}
+        
+        # Recent (ts_ms, temperature_c, humidity) per sensor, newest last
+        self._hist = {name: deque(maxlen=HISTORY_SIZE) for name in self.sensors}
         
-    def parse_tp357s_data(self, data):
-        """Parse TP357S data: Byte 3 = temp*10, Byte 5 = humidity"""
+        # Last raw packet per sensor, only hex-encoded for /api/sensors?debug=1
+        self._raw = {}
+        
+    def _unpack_valid(self, data):
+        """Unpack a TP357S packet: Byte 3 = temp*10, Byte 5 = humidity
+        
+        Returns the (byte 3, byte 5) pair, which indexes the lookup tables,
+        or None if the packet is malformed or out of range
+        """
         if len(data) != 7:
             return None
-            
-        try:
-            # Simple format: Byte 3 = temperature*10, Byte 5 = humidity%
-            temp_c = data[3] / 10.0
-            humidity = data[5]
-            
-            # Validate readings
-            if -40 <= temp_c <= 85 and 0 <= humidity <= 100:
-                return {
-                    'temperature_c': temp_c,
-                    'temperature_f': temp_c * 9/5 + 32,
-                    'humidity': humidity,
-                    'timestamp': datetime.now().isoformat(),
-                    'raw_data': data.hex()
-                }
-                
-        except Exception as e:
-            print(f"Parse error: {e}")
-            
+        
+        fields = _UNPACK(data)
+        b, humidity = fields
+        
+        # Validate readings
+        if _VALID_T[b] and 0 <= humidity <= 100:
+            return fields
         return None
     
+    def _set_status(self, name, status):
+        global _data_version
+        if connection_status.get(name) != status:
+            connection_status[name] = status
+            _data_version += 1
+    
     async def monitor_sensor(self, name, mac):
         """Monitor a single sensor continuously"""
-        global sensor_data, connection_status
-        
         while self.running:
             try:
-                print(f"🔄 Connecting to {name}...")
-                connection_status[name] = "Connecting"
+                log.info("🔄 Connecting to %s...", name)
+                self._set_status(name, "Connecting")
+                
+                # Set by Bleak when the link drops; otherwise we would sit on a
+                # dead connection until shutdown
+                link_lost = asyncio.Event()
                 
-                async with BleakClient(mac, timeout=15) as client:
-                    print(f"✅ Connected to {name}")
-                    connection_status[name] = "Connected"
+                async with BleakClient(mac, timeout=15,
+                                       disconnected_callback=lambda client, lost=link_lost: lost.set()) as client:
+                    log.info("✅ Connected to %s", name)
+                    self._set_status(name, "Connected")
                     
                     def notification_handler(sender, data):
-                        parsed = self.parse_tp357s_data(data)
-                        if parsed:
-                            sensor_data[name] = parsed
-                            timestamp = datetime.now().strftime('%H:%M:%S')
-                            print(f"📡 [{timestamp}] {name}: {parsed['temperature_c']:.1f}°C, {parsed['humidity']:.0f}%")
+                        global _data_version
+                        self._raw[name] = bytes(data)
+                        fields = self._unpack_valid(data)
+                        if fields:
+                            b, humidity = fields
+                            temperature_c = _TEMP_C[b]
+                            ts_ms = time.time_ns() // 1_000_000
+                            self._hist[name].append((ts_ms, temperature_c, humidity))
+                            
+                            # The sensor repeats unchanged readings about once a second
+                            reading = self._buf[name]
+                            if (reading['ts_ms'] and reading['temperature_c'] == temperature_c
+                                    and reading['humidity'] == humidity):
+                                return
+                            
+                            reading['temperature_c'] = temperature_c
+                            reading['temperature_f'] = _TEMP_F[b]
+                            reading['humidity'] = humidity
+                            reading['t_c_str'] = _TEMP_C_STR[b]
+                            reading['t_f_str'] = _TEMP_F_STR[b]
+                            reading['h_str'] = _HUM_STR[humidity]
+                            reading['ts_ms'] = ts_ms
+                            _data_version += 1
+                            if log.isEnabledFor(logging.DEBUG):
+                                log.debug("📡 %s: %.1f°C, %.0f%%", name, temperature_c, humidity)
                     
                     # Set up notifications
                     await client.start_notify(self.DATA_CHAR_UUID, notification_handler)
                     
-                    # Keep connection alive
-                    while self.running:
-                        await asyncio.sleep(1)
+                    # Keep connection alive until it drops or shutdown
+                    waiters = [asyncio.create_task(self._stop_event.wait()),
+                               asyncio.create_task(link_lost.wait())]
+                    try:
+                        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        for waiter in waiters:
+                            waiter.cancel()
+                    
+                    if link_lost.is_set():
+                        raise ConnectionError("connection lost")
                         
             except Exception as e:
-                print(f"❌ {name} error: {e}")
-                connection_status[name] = f"Error: {e}"
+                log.warning("❌ %s error: %s", name, e)
+                self._set_status(name, f"Error: {e}")
                 
                 # Wait before reconnecting
                 await asyncio.sleep(10)
@@ -91,7 +188,7 @@ class TP357SDashboard:
     async def run_monitoring(self):
         """Run monitoring for all sensors"""
         self.running = True
-        print("🌡️ Starting TP357S monitoring...")
+        log.info("🌡️ Starting TP357S monitoring...")
         
         # Start monitoring each sensor in parallel
         tasks = []
@@ -99,7 +196,22 @@ class TP357SDashboard:
             task = asyncio.create_task(self.monitor_sensor(name, mac))
             tasks.append(task)
         
+        tasks.append(asyncio.create_task(self.publisher()))
+        
         await asyncio.gather(*tasks)
+    
+    async def publisher(self):
+        """Publish pending readings to readers every PUBLISH_INTERVAL"""
+        global _sensor_snapshot, _published_version, _published
+        
+        while self.running:
+            if _published_version != _data_version:
+                _sensor_snapshot = {name: dict(reading) for name, reading in self._buf.items()
+                                    if reading['ts_ms']}
+                _published_version = _data_version
+                _published.set()
+                _published = asyncio.Event()
+            await asyncio.sleep(PUBLISH_INTERVAL)
 
 # Create dashboard instance
 dashboard = TP357SDashboard()
@@ -110,7 +222,6 @@ HTML_TEMPLATE = """
 <html>
 <head>
     <title>TP357S Temperature Dashboard</title>
-    <meta http-equiv="refresh" content="10">
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <style>
         body {
@@ -234,100 +345,224 @@ HTML_TEMPLATE = """
         <h1>🌡️ TP357S Dashboard</h1>
         
         <div class="status-bar">
-            Last updated: {{ current_time }} | Active sensors: {{ active_count }}/{{ total_count }}
+            Last updated: <span id="current-time">--:--:--</span> | Active sensors: <span id="active-count">0</span>/{{ total_count }}
         </div>
         
-        {% if sensor_data %}
-        <div class="sensor-grid">
-            {% for name, data in sensor_data.items() %}
-            <div class="sensor-card">
-                <div class="sensor-name">{{ name }}</div>
-                <div class="temp-display">
-                    {{ "%.1f"|format(data.temperature_c) }}<span class="temp-unit">°C</span>
-                </div>
-                <div class="temp-fahrenheit">
-                    {{ "%.1f"|format(data.temperature_f) }}°F
-                </div>
-                <div class="humidity-display">
-                    <span class="humidity-icon">💧</span>{{ "%.0f"|format(data.humidity) }}% RH
-                </div>
-                <div class="last-update">
-                    Last reading: {{ data.timestamp.split('T')[1].split('.')[0] }}
-                    <br>
-                    <span class="connection-status status-connected">Connected</span>
-                </div>
-            </div>
-            {% endfor %}
-        </div>
-        {% else %}
-        <div class="sensor-card">
+        <div class="sensor-grid" id="sensor-grid"></div>
+        <div class="sensor-card" id="no-data">
             <div class="no-data">
                 <h3>🔍 Connecting to sensors...</h3>
                 <p>Make sure your TP357S sensors are powered on and not connected to the mobile app.</p>
                 <p>This may take up to 30 seconds for the first connection.</p>
             </div>
         </div>
-        {% endif %}
     </div>
     
     <script>
-        // Auto-refresh every 10 seconds
-        setTimeout(function() {
-            window.location.reload();
-        }, 10000);
+        const grid = document.getElementById('sensor-grid');
+        const cards = {};
+        
+        function createCard(name) {
+            const card = document.createElement('div');
+            card.className = 'sensor-card';
+            card.innerHTML = `
+                <div class="sensor-name"></div>
+                <div class="temp-display">
+                    <span data-field="temp-c"></span><span class="temp-unit">°C</span>
+                </div>
+                <div class="temp-fahrenheit">
+                    <span data-field="temp-f"></span>°F
+                </div>
+                <div class="humidity-display">
+                    <span class="humidity-icon">💧</span><span data-field="humidity"></span>% RH
+                </div>
+                <div class="last-update">
+                    Last reading: <span data-field="last-reading"></span>
+                    <br>
+                    <span class="connection-status" data-field="status"></span>
+                </div>
+            `;
+            card.querySelector('.sensor-name').textContent = name;
+            grid.appendChild(card);
+            
+            const field = (key) => card.querySelector(`[data-field="${key}"]`);
+            return {
+                tempC: field('temp-c'),
+                tempF: field('temp-f'),
+                humidity: field('humidity'),
+                lastReading: field('last-reading'),
+                status: field('status')
+            };
+        }
+        
+        function update(payload) {
+            const timeOf = (iso) => iso.split('T')[1].split('.')[0];
+            document.getElementById('current-time').textContent = timeOf(payload.timestamp);
+            document.getElementById('active-count').textContent =
+                Object.values(payload.status).filter(s => s === 'Connected').length;
+            document.getElementById('no-data').hidden = Object.keys(payload.sensors).length > 0;
+            
+            for (const [name, data] of Object.entries(payload.sensors)) {
+                const card = cards[name] || (cards[name] = createCard(name));
+                card.tempC.textContent = data.t_c_str;
+                card.tempF.textContent = data.t_f_str;
+                card.humidity.textContent = data.h_str;
+                card.lastReading.textContent = new Date(data.ts_ms).toLocaleTimeString();
+                
+                const status = payload.status[name] || 'Connecting';
+                card.status.textContent = status;
+                card.status.className = 'connection-status ' + (
+                    status === 'Connected' ? 'status-connected' :
+                    status.startsWith('Error') ? 'status-error' : 'status-connecting');
+            }
+        }
+        
+        // The server pushes a fresh payload whenever readings change;
+        // EventSource reconnects on its own if the connection drops
+        const events = new EventSource('/api/stream');
+        events.onmessage = (event) => update(JSON.parse(event.data));
     </script>
 </body>
 </html>
 """
 
+# Compiled once; render_template_string would re-parse the template per request
+HTML_TPL = app.jinja_env.from_string(HTML_TEMPLATE)
+
+# The page is a static shell that fills itself in from /api/sensors, so it
+# only needs rendering once
+SHELL_HTML = HTML_TPL.render(total_count=len(dashboard.sensors)).encode('utf-8')
+SHELL_ETAG = hashlib.sha1(SHELL_HTML).hexdigest()
+
+# Compressed once up front: (Content-Encoding, body), best first
+SHELL_ENCODINGS = [('gzip', gzip.compress(SHELL_HTML, 9))]
+if brotli is not None:
+    SHELL_ENCODINGS.insert(0, ('br', brotli.compress(SHELL_HTML)))
+
 @app.route('/')
-def dashboard_home():
-    active_count = len([s for s in connection_status.values() if s == "Connected"])
-    total_count = len(dashboard.sensors)
+async def dashboard_home():
+    encoding, body, etag = None, SHELL_HTML, SHELL_ETAG
+    for name, compressed in SHELL_ENCODINGS:
+        if request.accept_encodings[name] > 0:
+            encoding, body, etag = name, compressed, f"{SHELL_ETAG}-{name}"
+            break
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='text/html')
+        if encoding:
+            response.content_encoding = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=10, stale-while-revalidate=60'
+    return response
+
+# Second-resolution timestamp string and the second it was formatted for
+_TS_CACHE = ['', 0]
+
+def _iso_now():
+    """Local ISO-8601 time, formatted at most once per second"""
+    sec = int(time.time())
+    if sec != _TS_CACHE[1]:
+        _TS_CACHE[:] = [time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec)), sec]
+    return _TS_CACHE[0]
+
+# Serialised /api/sensors payload, keyed on the published version and the
+# timestamp string it carries, so 'timestamp' stays the time it was served
+payload_cache = None
+payload_key = None
+
+def sensors_payload():
+    """Return the orjson-encoded /api/sensors body, rebuilding it on change"""
+    global payload_cache, payload_key
     
-    return render_template_string(
-        HTML_TEMPLATE,
-        sensor_data=sensor_data,
-        connection_status=connection_status,
-        current_time=datetime.now().strftime('%H:%M:%S'),
-        active_count=active_count,
-        total_count=total_count
-    )
+    timestamp = _iso_now()
+    if payload_key != (_published_version, timestamp):
+        payload_cache = orjson.dumps({
+            'sensors': _sensor_snapshot,
+            'status': connection_status,
+            'timestamp': timestamp
+        })
+        payload_key = (_published_version, timestamp)
+    return payload_cache
 
 @app.route('/api/sensors')
-def api_sensors():
-    return jsonify({
-        'sensors': sensor_data,
-        'status': connection_status,
-        'timestamp': datetime.now().isoformat()
-    })
-
-def run_dashboard():
-    """Run the async sensor monitoring in a separate thread"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(dashboard.run_monitoring())
+async def api_sensors():
+    if request.args.get('debug') == '1':
+        return Response(orjson.dumps({
+            'sensors': {name: {**data, 'raw': dashboard._raw[name].hex()}
+                        for name, data in _sensor_snapshot.items()},
+            'status': connection_status,
+            'timestamp': _iso_now()
+        }), mimetype='application/json', headers={'Cache-Control': 'no-store'})
+    
+    # Weak: bodies of one version differ only in their timestamp
+    etag = f"{_BOOT_ID}-v{_published_version}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(sensors_payload(), mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'max-age=1, stale-while-revalidate=5'
+    return response
+
+@app.route('/api/stream')
+async def stream():
+    """Push the /api/sensors payload whenever a new version is published"""
+    async def events():
+        version = None
+        while True:
+            if version != _published_version:
+                version = _published_version
+                yield b'data: ' + sensors_payload() + b'\n\n'
+            try:
+                await asyncio.wait_for(_published.wait(), STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+    
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    response.timeout = None  # Streams stay open indefinitely
+    return response
+
+@app.route('/api/sensors/history')
+async def api_history():
+    body = orjson.dumps({name: list(hist) for name, hist in dashboard._hist.items()})
+    return Response(body, mimetype='application/json')
+
+@app.before_serving
+async def start_monitoring():
+    """Run the sensor monitoring on the server's event loop"""
+    app.monitor_task = asyncio.create_task(dashboard.run_monitoring())
+
+@app.after_serving
+async def stop_monitoring():
+    dashboard.running = False
+    dashboard._stop_event.set()
+    app.monitor_task.cancel()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if DEBUG else logging.INFO,
+                        format='%(asctime)s %(message)s', datefmt='%H:%M:%S')
     print("🌡️ TP357S Dashboard Starting...")
     print("Format: Temperature = Byte 3 ÷ 10, Humidity = Byte 5")
     print("Make sure sensors are not connected to the mobile app!")
     
-    # Start the sensor monitoring in a separate thread
-    sensor_thread = threading.Thread(target=run_dashboard, daemon=True)
-    sensor_thread.start()
-    
-    # Give sensors a moment to start connecting
-    time.sleep(2)
+    # Sensor monitoring starts with the server (see start_monitoring);
+    # equivalent to `hypercorn old-file:app --bind 0.0.0.0:5000`
+    config = Config()
+    config.bind = ["0.0.0.0:5000"]
+    # Hold idle connections long enough for /api/sensors pollers to reuse them
+    config.keep_alive_timeout = 30
     
-    # Start the Flask web server
     print(f"\n🌐 Dashboard available at:")
     print(f"   Local: http://localhost:5000")
     print(f"   Network: http://192.168.5.40:5000")
     print(f"\nPress Ctrl+C to stop\n")
     
     try:
-        app.run(host='0.0.0.0', port=5000, debug=False)
+        run = uvloop.run if uvloop is not None else asyncio.run
+        run(serve(app, config))
     except KeyboardInterrupt:
-        print("\nDashboard stopped.")
-        dashboard.running = False
\ No newline at end of file
+        print("\nDashboard stopped.")
\ No newline at end of file